@@ -3,21 +3,147 @@ from __future__ import annotations
 import argparse
 import csv
 import sqlite3
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date, datetime
+from functools import lru_cache
+from itertools import islice
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Callable, Dict, Iterable, Iterator, Optional, List, Tuple
 
 
 DB_NAME = "expenses.db"
+SCHEMA_VERSION = 2  # stored in PRAGMA user_version once init_db has run
+# rows per multi-row INSERT in bulk inserts; 4 parameters per row must stay under
+# SQLite's host-parameter limit, which was 999 before 3.32
+BULK_INSERT_ROWS = 500 if sqlite3.sqlite_version_info >= (3, 32, 0) else 249
+AHO_CORASICK_MIN_RULES = 32  # below this a plain substring scan is faster
+DFA_MAX_STATES = 8192  # larger automata keep failure links: tables get big and scans no faster
+CATEGORY_CACHE_SIZE = 65536  # distinct descriptions remembered per import
+DATE_CACHE_SIZE = 4096  # distinct raw dates remembered per import
+STATEMENT_CACHE_SIZE = 256  # prepared statements kept per connection
+EXPORT_BATCH_SIZE = 1000  # rows fetched per round-trip when exporting
+FTS_MIN_SEARCH_LEN = 3  # the trigram index cannot answer shorter searches
+
+# Statements used on the command paths. Keeping each one as a single module-level
+# string means every call passes identical SQL text and hits sqlite3's statement cache.
+_SQL_INSERT_EXPENSE = "INSERT INTO expenses (spent_on, amount_cents, category, note) VALUES (?, ?, ?, ?)"
+_SQL_INSERT_EXPENSES_MANY = "INSERT INTO expenses (spent_on, amount_cents, category, note) VALUES {values}"
+_SQL_DELETE_EXPENSE = "DELETE FROM expenses WHERE id = ?"
+_SQL_SELECT_EXPENSES = "SELECT id, spent_on, amount_cents, category, note FROM expenses"
+_SQL_MONTH_FILTER = "spent_on >= ? AND spent_on < ?"
+_SQL_NOTE_FTS_FILTER = "id IN (SELECT rowid FROM notes_fts WHERE notes_fts MATCH ?)"
+_SQL_NOTE_LIKE_FILTER = "COALESCE(note,'') LIKE ? ESCAPE '\\'"
+_SQL_TOTALS_BY_CATEGORY = """
+    SELECT category, SUM(amount_cents) AS total
+    FROM expenses
+    GROUP BY category
+    ORDER BY total DESC;
+    """
+# per-category spending LEFT JOIN budgets, plus budget-only categories (spent is NULL);
+# SQLite has no FULL OUTER JOIN, hence the UNION ALL
+_SQL_MONTH_TOTALS_WITH_BUDGETS = f"""
+    WITH e AS (
+        SELECT category, SUM(amount_cents) AS total
+        FROM expenses
+        WHERE {_SQL_MONTH_FILTER}
+        GROUP BY category
+    ),
+    b AS (
+        SELECT category, amount_cents FROM budgets WHERE month = ?
+    )
+    SELECT e.category, e.total AS spent, b.amount_cents
+    FROM e LEFT JOIN b ON b.category = e.category
+    UNION ALL
+    SELECT b.category, NULL, b.amount_cents
+    FROM b
+    WHERE b.category NOT IN (SELECT category FROM e)
+    ORDER BY spent DESC;
+    """
+# amount is formatted like cents_to_dollars() so rows can go straight to the CSV writer
+_SQL_EXPORT_MONTH = f"""
+    SELECT spent_on,
+           printf('%s%d.%02d', CASE WHEN amount_cents < 0 THEN '-' ELSE '' END,
+                  abs(amount_cents) / 100, abs(amount_cents) % 100),
+           category,
+           COALESCE(note,'')
+    FROM expenses
+    WHERE {_SQL_MONTH_FILTER}
+    ORDER BY spent_on ASC, id ASC
+    """
+_SQL_UPSERT_BUDGET = """
+    INSERT INTO budgets (month, category, amount_cents)
+    VALUES (?, ?, ?)
+    ON CONFLICT(month, category) DO UPDATE SET amount_cents = excluded.amount_cents
+    """
+_SQL_SELECT_BUDGETS = "SELECT category, amount_cents FROM budgets WHERE month = ? ORDER BY amount_cents DESC"
+_SQL_INSERT_RULE = "INSERT INTO rules (keyword, category, priority) VALUES (?, ?, ?)"
+_SQL_SELECT_RULES = "SELECT id, keyword, category, priority FROM rules ORDER BY priority DESC, id ASC"
+# blank-category rules (accepted by older versions of add_rule) are ignored when matching
+_SQL_SELECT_RULE_KEYWORDS = "SELECT keyword, category FROM rules WHERE trim(category) != '' ORDER BY priority DESC, id ASC"
 
 
 def connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+    conn = sqlite3.connect(db_path, cached_statements=STATEMENT_CACHE_SIZE)
+    conn.executescript(
+        """
+        PRAGMA foreign_keys = ON;
+        PRAGMA journal_mode = WAL;       -- persisted in the db file; readers no longer block writers
+        PRAGMA synchronous = NORMAL;     -- safe with WAL, avoids an fsync per commit
+        PRAGMA temp_store = MEMORY;
+        PRAGMA cache_size = -20000;      -- ~20 MB page cache
+        """
+    )
+    try:
+        conn.execute("PRAGMA mmap_size = 268435456;")
+    except sqlite3.DatabaseError:
+        pass  # memory-mapped I/O is unavailable on some builds/platforms
     return conn
 
 
+@contextmanager
+def _bulk_insert_context(conn: sqlite3.Connection) -> Iterator[None]:
+    """
+    Run a block of inserts as one IMMEDIATE transaction with journaling/fsync relaxed.
+    Previous PRAGMA values are restored afterwards; the block is rolled back on error.
+    A WAL database stays in WAL mode, since leaving it forces a checkpoint each time.
+    If the caller already has a transaction open, the block runs inside it under a
+    savepoint instead: no PRAGMA changes, no commit, only the block is undone on error.
+    """
+    if conn.in_transaction:
+        conn.execute("SAVEPOINT bulk_insert;")
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK TO bulk_insert;")
+            conn.execute("RELEASE bulk_insert;")
+            raise
+        conn.execute("RELEASE bulk_insert;")
+        return
+
+    journal_mode = conn.execute("PRAGMA journal_mode;").fetchone()[0]
+    synchronous = conn.execute("PRAGMA synchronous;").fetchone()[0]
+    temp_store = conn.execute("PRAGMA temp_store;").fetchone()[0]
+
+    if journal_mode.lower() != "wal":
+        conn.execute("PRAGMA journal_mode = MEMORY;")
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        try:
+            yield
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+    finally:
+        if journal_mode.lower() != "wal":
+            conn.execute(f"PRAGMA journal_mode = {journal_mode};")
+        conn.execute(f"PRAGMA synchronous = {int(synchronous)};")
+        conn.execute(f"PRAGMA temp_store = {int(temp_store)};")
+
+
 def init_db(conn: sqlite3.Connection) -> None:
     conn.execute(
         """
@@ -30,18 +156,37 @@ def init_db(conn: sqlite3.Connection) -> None:
         );
         """
     )
+    # (spent_on, rowid) order lets `list`'s ORDER BY spent_on DESC, id DESC LIMIT n stop early
     conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_spent_on ON expenses(spent_on);")
-    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category ON expenses(category);")
-    conn.execute(
-        """
+    # covering indexes for the totals/category filters; cat_date supersedes idx_expenses_category
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_cover ON expenses(spent_on, category, amount_cents);")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_cat_date ON expenses(category, spent_on, amount_cents);")
+    conn.execute("DROP INDEX IF EXISTS idx_expenses_category;")
+    budgets_ddl = """
         CREATE TABLE IF NOT EXISTS budgets (
             month TEXT NOT NULL,             -- YYYY-MM
             category TEXT NOT NULL,
             amount_cents INTEGER NOT NULL,
             PRIMARY KEY (month, category)
-        );
+        ) WITHOUT ROWID;
         """
-    )
+    row = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'budgets'").fetchone()
+    if row and "WITHOUT ROWID" not in row[0].upper():
+        # upgrade databases created before budgets was a WITHOUT ROWID table
+        conn.commit()
+        conn.executescript(
+            f"""
+            BEGIN;
+            ALTER TABLE budgets RENAME TO budgets_old;
+            {budgets_ddl}
+            INSERT INTO budgets (month, category, amount_cents)
+                SELECT month, category, amount_cents FROM budgets_old;
+            DROP TABLE budgets_old;
+            COMMIT;
+            """
+        )
+    else:
+        conn.execute(budgets_ddl)
 
     conn.execute(
         """
@@ -55,16 +200,87 @@ def init_db(conn: sqlite3.Connection) -> None:
     )
     conn.execute("CREATE INDEX IF NOT EXISTS idx_rules_priority ON rules(priority DESC);")
 
+    # trigram full-text index over expenses.note, kept in sync by triggers
+    if not _has_notes_fts(conn):
+        try:
+            conn.execute(
+                """
+                CREATE VIRTUAL TABLE notes_fts USING fts5(
+                    note, content='expenses', content_rowid='id', tokenize='trigram'
+                );
+                """
+            )
+        except sqlite3.OperationalError:
+            pass  # SQLite built without FTS5/trigram: note search falls back to LIKE
+        else:
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+                    INSERT INTO notes_fts (rowid, note) VALUES (new.id, new.note);
+                END;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+                    INSERT INTO notes_fts (notes_fts, rowid, note) VALUES ('delete', old.id, old.note);
+                END;
+                """
+            )
+            conn.execute(
+                """
+                CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE ON expenses BEGIN
+                    INSERT INTO notes_fts (notes_fts, rowid, note) VALUES ('delete', old.id, old.note);
+                    INSERT INTO notes_fts (rowid, note) VALUES (new.id, new.note);
+                END;
+                """
+            )
+            # index notes that were stored before the FTS table existed
+            conn.execute("INSERT INTO notes_fts (notes_fts) VALUES ('rebuild');")
+
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
     conn.commit()
 
 
+def _has_notes_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone() is not None
+
+
+def _fast_iso_date(s: str) -> Optional[date]:
+    """
+    Parse a zero-padded YYYY-MM-DD without going through strptime.
+    Returns None if s has any other shape; raises ValueError for impossible dates.
+    """
+    if len(s) == 10 and s[4] == "-" and s[7] == "-" and s.isascii():
+        y, m, d = s[0:4], s[5:7], s[8:10]
+        if y.isdigit() and m.isdigit() and d.isdigit():
+            return date(int(y), int(m), int(d))
+    return None
+
+
+def _make_date_parser(date_format: str) -> Callable[[str], str]:
+    """
+    Return a function converting a CSV date in date_format to YYYY-MM-DD (ValueError on failure).
+    A statement lists many rows per day, so each distinct raw date is only parsed once.
+    """
+    if date_format == "%Y-%m-%d":
+        def parse(raw: str) -> str:
+            if _fast_iso_date(raw) is not None:
+                return raw
+            return datetime.strptime(raw, date_format).date().isoformat()
+    else:
+        def parse(raw: str) -> str:
+            return datetime.strptime(raw, date_format).date().isoformat()
+    return lru_cache(maxsize=DATE_CACHE_SIZE)(parse)
+
+
 def parse_date(s: str) -> str:
     """Return YYYY-MM-DD string. Accepts YYYY-MM-DD or 'today'."""
     s = s.strip().lower()
     if s == "today":
         return date.today().isoformat()
     try:
-        dt = datetime.strptime(s, "%Y-%m-%d").date()
+        dt = _fast_iso_date(s) or datetime.strptime(s, "%Y-%m-%d").date()
         return dt.isoformat()
     except ValueError:
         raise SystemExit("Invalid date. Use YYYY-MM-DD or 'today'.")
@@ -100,15 +316,37 @@ def dollars_to_cents(s: str) -> int:
     return int(dollars) * 100 + int(cents)
 
 
+def _csv_amount_to_cents(raw: str) -> int:
+    """
+    Convert a bank CSV amount like '-1,234.56' to signed cents.
+    Plain digit amounts take a fast path; anything else goes through dollars_to_cents.
+    """
+    # Allow amounts like -12.34 or 12.34
+    amt = raw.replace(",", "").strip()
+    sign = -1 if amt.startswith("-") else 1
+    amt_num = amt[1:] if sign < 0 else amt
+    dollars, _, cents = amt_num.partition(".")
+    if dollars.isascii() and dollars.isdigit() and (not cents or (cents.isascii() and cents.isdigit())):
+        # dollars followed by exactly two cent digits is the amount in cents: one int() parse
+        return sign * int(dollars + (cents + "00")[:2])
+    return dollars_to_cents(amt_num) * sign
+
+
+_CENTS_DIGITS = [f"{i:02d}" for i in range(100)]  # two-digit cents lookup for cents_to_dollars
+
+
 def cents_to_dollars(cents: int) -> str:
-    sign = "-" if cents < 0 else ""
-    cents = abs(cents)
-    return f"{sign}{cents // 100}.{cents % 100:02d}"
+    if cents < 0:
+        d, r = divmod(-cents, 100)
+        return f"-{d}.{_CENTS_DIGITS[r]}"
+    d, r = divmod(cents, 100)
+    return f"{d}.{_CENTS_DIGITS[r]}"
 
 def parse_date_ymd(s: str) -> date:
     """Parse YYYY-MM-DD into a date object."""
     try:
-        return datetime.strptime(s.strip(), "%Y-%m-%d").date()
+        s = s.strip()
+        return _fast_iso_date(s) or datetime.strptime(s, "%Y-%m-%d").date()
     except ValueError:
         raise SystemExit("Invalid date. Use YYYY-MM-DD.")
 
@@ -127,6 +365,14 @@ def parse_month_ym(s: str) -> str:
     return s
 
 
+def _month_bounds(ym: str) -> Tuple[str, str]:
+    """
+    Return ("YYYY-MM-01", "YYYY-MM-32"): every date in the month sorts between them
+    and the next month sorts after. Plain strings, so any year parse_month_ym accepts works.
+    """
+    return f"{ym}-01", f"{ym}-32"
+
+
 def month_of(spent_on_yyyy_mm_dd: str) -> str:
     return spent_on_yyyy_mm_dd[:7]
 
@@ -142,13 +388,39 @@ def add_expense(conn: sqlite3.Connection, spent_on: str, amount_cents: int, cate
         raise SystemExit("Category cannot be empty.")
     note = (note or "").strip() or None
 
-    conn.execute(
-        "INSERT INTO expenses (spent_on, amount_cents, category, note) VALUES (?, ?, ?, ?)",
-        (spent_on, amount_cents, category, note),
-    )
+    conn.execute(_SQL_INSERT_EXPENSE, (spent_on, amount_cents, category, note))
     conn.commit()
 
 
+def add_expenses_bulk(conn: sqlite3.Connection, rows: Iterable[Tuple[str, int, str, Optional[str]]]) -> int:
+    """
+    Insert many (spent_on, amount_cents, category, note) rows in a single transaction,
+    BULK_INSERT_ROWS rows per multi-row INSERT statement.
+    Same normalization as add_expense, but one commit for the whole batch instead of
+    one per row; use this rather than calling add_expense in a loop. Returns the row count.
+    """
+    def normalized() -> Iterator[Tuple[str, int, str, Optional[str]]]:
+        for spent_on, amount_cents, category, note in rows:
+            category = normalize_category(category)
+            if not category:
+                raise SystemExit(f"Category cannot be empty (row: {spent_on} {note!r}).")
+            yield (spent_on, amount_cents, category, (note or "").strip() or None)
+
+    it = normalized()
+    count = 0
+    full_sql = _insert_expenses_sql(BULK_INSERT_ROWS)
+    with _bulk_insert_context(conn):
+        while chunk := list(islice(it, BULK_INSERT_ROWS)):
+            sql = full_sql if len(chunk) == BULK_INSERT_ROWS else _insert_expenses_sql(len(chunk))
+            conn.execute(sql, [v for row in chunk for v in row])
+            count += len(chunk)
+    return count
+
+
+def _insert_expenses_sql(n_rows: int) -> str:
+    return _SQL_INSERT_EXPENSES_MANY.format(values=", ".join(["(?, ?, ?, ?)"] * n_rows))
+
+
 def list_expenses(
     conn: sqlite3.Connection,
     limit: int = 20,
@@ -158,7 +430,7 @@ def list_expenses(
     date_to: Optional[str] = None,    # YYYY-MM-DD
     search: Optional[str] = None,     # substring match in note
 ) -> List[Tuple[int, str, int, str, Optional[str]]]:
-    sql = "SELECT id, spent_on, amount_cents, category, note FROM expenses"
+    sql = _SQL_SELECT_EXPENSES
     params = []
     where = []
 
@@ -168,8 +440,8 @@ def list_expenses(
 
     if month:
         month = parse_month_ym(month)
-        where.append("substr(spent_on, 1, 7) = ?")
-        params.append(month)
+        where.append(_SQL_MONTH_FILTER)
+        params.extend(_month_bounds(month))
 
     if date_from:
         date_from = parse_date(date_from)
@@ -182,8 +454,14 @@ def list_expenses(
         params.append(date_to)
 
     if search:
-        where.append("COALESCE(note,'') LIKE ?")
-        params.append(f"%{search}%")
+        # The trigram index narrows candidates (phrase query = substring match), but it also
+        # folds non-ASCII case, so LIKE still decides the match. '%' and '_' are literal.
+        if len(search) >= FTS_MIN_SEARCH_LEN and _has_notes_fts(conn):
+            where.append(_SQL_NOTE_FTS_FILTER)
+            params.append('"' + search.replace('"', '""') + '"')
+        where.append(_SQL_NOTE_LIKE_FILTER)
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
 
     if where:
         sql += " WHERE " + " AND ".join(where)
@@ -205,44 +483,20 @@ def totals(
       totals_by_category,
       budgets_by_category (for that month; empty if month not provided)
     """
-    params = []
-    where = ""
-    if month:
-        month = parse_month_ym(month)
-        where = "WHERE substr(spent_on, 1, 7) = ?"
-        params.append(month)
-
-    total_cents = conn.execute(f"SELECT COALESCE(SUM(amount_cents), 0) FROM expenses {where}", params).fetchone()[0]
-
-    by_cat = conn.execute(
-        f"""
-        SELECT category, COALESCE(SUM(amount_cents), 0) AS total
-        FROM expenses
-        {where}
-        GROUP BY category
-        ORDER BY total DESC;
-        """,
-        params,
-    ).fetchall()
-
-    budgets = []
-    if month:
-        budgets = conn.execute(
-            """
-            SELECT category, amount_cents
-            FROM budgets
-            WHERE month = ?
-            ORDER BY amount_cents DESC;
-            """,
-            (month,),
-        ).fetchall()
+    if not month:
+        by_cat = [(c, int(t)) for c, t in conn.execute(_SQL_TOTALS_BY_CATEGORY)]
+        return sum(t for _, t in by_cat), by_cat, []
 
-    return int(total_cents), [(c, int(t)) for c, t in by_cat], [(c, int(b)) for c, b in budgets]
+    month = parse_month_ym(month)
+    rows = conn.execute(_SQL_MONTH_TOTALS_WITH_BUDGETS, (*_month_bounds(month), month)).fetchall()
+    by_cat = [(c, int(t)) for c, t, _ in rows if t is not None]
+    budgets = sorted(((c, int(b)) for c, _, b in rows if b is not None), key=lambda cb: -cb[1])
+    return sum(t for _, t in by_cat), by_cat, budgets
 
 
 
 def delete_expense(conn: sqlite3.Connection, expense_id: int) -> None:
-    cur = conn.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+    cur = conn.execute(_SQL_DELETE_EXPENSE, (expense_id,))
     conn.commit()
     if cur.rowcount == 0:
         raise SystemExit(f"No expense found with id {expense_id}.")
@@ -250,23 +504,13 @@ def delete_expense(conn: sqlite3.Connection, expense_id: int) -> None:
 def set_budget(conn: sqlite3.Connection, month: str, category: str, amount_cents: int) -> None:
     month = parse_month_ym(month)
     category = normalize_category(category)
-    conn.execute(
-        """
-        INSERT INTO budgets (month, category, amount_cents)
-        VALUES (?, ?, ?)
-        ON CONFLICT(month, category) DO UPDATE SET amount_cents = excluded.amount_cents
-        """,
-        (month, category, amount_cents),
-    )
+    conn.execute(_SQL_UPSERT_BUDGET, (month, category, amount_cents))
     conn.commit()
 
 
 def list_budgets(conn: sqlite3.Connection, month: str) -> List[Tuple[str, int]]:
     month = parse_month_ym(month)
-    return [(c, int(a)) for c, a in conn.execute(
-        "SELECT category, amount_cents FROM budgets WHERE month = ? ORDER BY amount_cents DESC",
-        (month,),
-    ).fetchall()]
+    return [(c, int(a)) for c, a in conn.execute(_SQL_SELECT_BUDGETS, (month,)).fetchall()]
 
 
 def add_rule(conn: sqlite3.Connection, keyword: str, category: str, priority: int) -> None:
@@ -274,17 +518,123 @@ def add_rule(conn: sqlite3.Connection, keyword: str, category: str, priority: in
     if not keyword:
         raise SystemExit("Keyword cannot be empty.")
     category = normalize_category(category)
-    conn.execute(
-        "INSERT INTO rules (keyword, category, priority) VALUES (?, ?, ?)",
-        (keyword, category, priority),
-    )
+    if not category:
+        raise SystemExit("Category cannot be empty.")
+    conn.execute(_SQL_INSERT_RULE, (keyword, category, priority))
     conn.commit()
 
 
 def list_rules(conn: sqlite3.Connection) -> List[Tuple[int, str, str, int]]:
-    return conn.execute(
-        "SELECT id, keyword, category, priority FROM rules ORDER BY priority DESC, id ASC"
-    ).fetchall()
+    return conn.execute(_SQL_SELECT_RULES).fetchall()
+
+
+def _load_rules(conn: sqlite3.Connection) -> List[Tuple[str, str]]:
+    """Return [(keyword_lower, category), ...] ordered so the first match wins."""
+    return [(kw.lower(), cat) for kw, cat in conn.execute(_SQL_SELECT_RULE_KEYWORDS)]
+
+
+def _categorize(text_lower: str, rules: List[Tuple[str, str]]) -> str:
+    for kw, cat in rules:
+        if kw in text_lower:
+            return cat
+    return "uncategorized"
+
+
+def _build_automaton(rules: List[Tuple[str, str]]) -> Tuple[List[Dict[str, int]], List[int], List[int]]:
+    """
+    Build an Aho-Corasick automaton over the rule keywords.
+    Returns (goto, fail, best) where best[state] is the lowest rule index
+    (i.e. highest priority) whose keyword ends at that state, or len(rules).
+    """
+    none = len(rules)
+    goto: List[Dict[str, int]] = [{}]
+    best = [none]
+    for i, (kw, _cat) in enumerate(rules):
+        state = 0
+        for ch in kw:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto[state][ch] = nxt
+                goto.append({})
+                best.append(none)
+            state = nxt
+        best[state] = min(best[state], i)
+
+    # breadth-first pass to wire failure links and inherit matches along them
+    fail = [0] * len(goto)
+    queue = list(goto[0].values())
+    for state in queue:
+        for ch, nxt in goto[state].items():
+            f = fail[state]
+            while f and ch not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f].get(ch, 0) if state else 0
+            best[nxt] = min(best[nxt], best[fail[nxt]])
+            queue.append(nxt)
+    return goto, fail, best
+
+
+def _flatten_automaton(goto: List[Dict[str, int]], fail: List[int]) -> List[Dict[str, int]]:
+    """
+    Fold the failure links into full transition tables (a DFA), so a scan never
+    backtracks. delta[state][ch] is the next state; a missing entry means the root.
+    Each state copies its failure state's table, so this costs several times the
+    memory of the automaton itself.
+    """
+    delta: List[Dict[str, int]] = [dict(goto[0])] + [{}] * (len(goto) - 1)
+    queue = list(goto[0].values())
+    # breadth-first, so delta[fail[state]] is complete before it is copied
+    for state in queue:
+        delta[state] = {**delta[fail[state]], **goto[state]}
+        queue.extend(goto[state].values())
+    return delta
+
+
+def _build_categorizer(rules: List[Tuple[str, str]]) -> Callable[[str], str]:
+    """
+    Return a function mapping a lowercased description to its category.
+    Large rule sets are matched with one Aho-Corasick pass per description
+    instead of one substring test per rule; automata of up to DFA_MAX_STATES
+    states are flattened into a DFA first. Bank exports repeat the same
+    merchant strings a lot, so results are cached per distinct description.
+    """
+    if not rules:
+        return lambda text_lower: "uncategorized"
+    if len(rules) < AHO_CORASICK_MIN_RULES:
+        return lru_cache(maxsize=CATEGORY_CACHE_SIZE)(lambda text_lower: _categorize(text_lower, rules))
+
+    goto, fail, best = _build_automaton(rules)
+    none = len(rules)
+
+    if len(goto) <= DFA_MAX_STATES:
+        delta = _flatten_automaton(goto, fail)
+
+        def categorize(text_lower: str) -> str:
+            state = 0
+            hit = none
+            for ch in text_lower:
+                state = delta[state].get(ch, 0)
+                if best[state] < hit:
+                    hit = best[state]
+                    if hit == 0:
+                        break
+            return rules[hit][1] if hit < none else "uncategorized"
+    else:
+        def categorize(text_lower: str) -> str:
+            state = 0
+            hit = none
+            for ch in text_lower:
+                while state and ch not in goto[state]:
+                    state = fail[state]
+                state = goto[state].get(ch, 0)
+                if best[state] < hit:
+                    hit = best[state]
+                    if hit == 0:
+                        break
+            return rules[hit][1] if hit < none else "uncategorized"
+
+    return lru_cache(maxsize=CATEGORY_CACHE_SIZE)(categorize)
 
 
 def categorize_with_rules(conn: sqlite3.Connection, text: str) -> str:
@@ -292,13 +642,37 @@ def categorize_with_rules(conn: sqlite3.Connection, text: str) -> str:
     Simple rule engine: if keyword is contained in description/note (case-insensitive),
     pick the highest priority match. If none, return 'uncategorized'.
     """
-    t = (text or "").lower()
-    for _, kw, cat, _prio in conn.execute(
-        "SELECT id, keyword, category, priority FROM rules ORDER BY priority DESC, id ASC"
-    ):
-        if kw in t:
-            return cat
-    return "uncategorized"
+    return _categorize((text or "").lower(), _load_rules(conn))
+
+
+def _iter_rows(
+    reader: csv.DictReader,
+    categorize: Callable[[str], str],
+    date_col: str,
+    amount_col: str,
+    desc_col: str,
+    date_format: str,
+) -> Iterator[Tuple[str, int, str, Optional[str]]]:
+    """Yield (spent_on, amount_cents, category, note) for each usable CSV row."""
+    parse_csv_date = _make_date_parser(date_format)
+    for row in reader:
+        raw_date = (row.get(date_col) or "").strip()
+        raw_amt = (row.get(amount_col) or "").strip()
+        raw_desc = (row.get(desc_col) or "").strip()
+
+        if not raw_date or not raw_amt:
+            continue
+
+        try:
+            d = parse_csv_date(raw_date)
+        except ValueError:
+            raise SystemExit(f"Date parse failed for '{raw_date}'. Check --date-format.")
+
+        amount_cents = _csv_amount_to_cents(raw_amt)
+        category = categorize(raw_desc.lower())
+        note = raw_desc or None
+
+        yield (d, amount_cents, category, note)
 
 
 def import_csv(
@@ -315,69 +689,33 @@ def import_csv(
     - Auto-categorizes based on rules table.
     - Writes note=description, category=rule match.
     - dry_run=True prints/returns count but does not insert.
+    Rows are streamed into add_expenses_bulk, i.e. multi-row inserts inside one transaction.
     """
     if not csv_path.exists():
         raise SystemExit(f"CSV not found: {csv_path}")
 
-    to_insert = []
     with csv_path.open("r", encoding="utf-8-sig", newline="") as f:
         reader = csv.DictReader(f)
         if reader.fieldnames is None:
             raise SystemExit("CSV has no headers.")
 
-        for row in reader:
-            raw_date = (row.get(date_col) or "").strip()
-            raw_amt = (row.get(amount_col) or "").strip()
-            raw_desc = (row.get(desc_col) or "").strip()
-
-            if not raw_date or not raw_amt:
-                continue
-
-            try:
-                d = datetime.strptime(raw_date, date_format).date().isoformat()
-            except ValueError:
-                raise SystemExit(f"Date parse failed for '{raw_date}'. Check --date-format.")
-
-            # Allow amounts like -12.34 or 12.34
-            amt = raw_amt.replace(",", "").strip()
-            sign = -1 if amt.startswith("-") else 1
-            amt_num = amt[1:] if amt.startswith("-") else amt
-            amount_cents = dollars_to_cents(amt_num) * sign
-
-            category = categorize_with_rules(conn, raw_desc)
-            note = raw_desc or None
-
-            to_insert.append((d, amount_cents, category, note))
-
-    if dry_run:
-        return len(to_insert)
-
-    conn.executemany(
-        "INSERT INTO expenses (spent_on, amount_cents, category, note) VALUES (?, ?, ?, ?)",
-        to_insert,
-    )
-    conn.commit()
-    return len(to_insert)
+        categorize = _build_categorizer(_load_rules(conn))
+        rows = _iter_rows(reader, categorize, date_col, amount_col, desc_col, date_format)
+        if dry_run:
+            return sum(1 for _ in rows)
+        return add_expenses_bulk(conn, rows)
 
 
 def export_month_csv(conn: sqlite3.Connection, month: str, out_path: Path) -> None:
     month = parse_month_ym(month)
-    rows = conn.execute(
-        """
-        SELECT spent_on, amount_cents, category, COALESCE(note,'')
-        FROM expenses
-        WHERE substr(spent_on, 1, 7) = ?
-        ORDER BY spent_on ASC, id ASC
-        """,
-        (month,),
-    ).fetchall()
+    cur = conn.execute(_SQL_EXPORT_MONTH, _month_bounds(month))
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
     with out_path.open("w", encoding="utf-8", newline="") as f:
         w = csv.writer(f)
         w.writerow(["date", "amount", "category", "note"])
-        for spent_on, amount_cents, category, note in rows:
-            w.writerow([spent_on, cents_to_dollars(int(amount_cents)), category, note])
+        for batch in iter(lambda: cur.fetchmany(EXPORT_BATCH_SIZE), []):
+            w.writerows(batch)
 
 
 def main() -> None:
@@ -439,8 +777,10 @@ def main() -> None:
     db_path = Path(__file__).parent / DB_NAME
     conn = connect(db_path)
 
-    # Ensure schema exists for all commands (init is still available explicitly)
-    init_db(conn)
+    # Ensure schema exists for all commands; skip the DDL when the db is already current
+    # (init always re-runs it)
+    if args.cmd == "init" or conn.execute("PRAGMA user_version;").fetchone()[0] < SCHEMA_VERSION:
+        init_db(conn)
 
     if args.cmd == "init":
         print(f"Database ready: {db_path}")